@@ -1,48 +1,152 @@
 #!/usr/bin/env python3
 
 import argparse
+import mmap
+import os
+import re
+import tempfile
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # The directory containing this file
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 
+# Globs of files where version number must change
+DEFAULT_GLOBS = ["pyproject.toml"]
 
-def get_files(path: Path = PROJECT_ROOT) -> list[Path]:
+
+def get_files(
+    path: Path = PROJECT_ROOT, globs: list[str] = DEFAULT_GLOBS
+) -> list[Path]:
     """Files where version number must change
 
     Args:
         path (Path, optional): Repository root path. Defaults to PROJECT_ROOT.
+        globs (list[str], optional): Glob patterns relative to path. Defaults to DEFAULT_GLOBS.
 
     Returns:
         list[Path]: List of files with path to be changed.
+
+    Example:
+        >>> get_files(PROJECT_ROOT, ["pyproject.toml", "*.toml"]) == [PROJECT_ROOT / "pyproject.toml"]
+        True
+    """
+    files = {file for pattern in globs for file in path.glob(pattern) if file.is_file()}
+
+    return sorted(files)
+
+
+def make_pattern(replacements: dict[str, str]) -> re.Pattern:
+    """Compile all find strings into a single pattern.
+
+    Longer strings come first, so that the longest match wins when find
+    strings overlap.
+
+    Args:
+        replacements (dict[str, str]): Find strings mapped to their replacements.
+
+    Returns:
+        re.Pattern: Bytes pattern matching any of the find strings.
+
+    Example:
+        >>> pattern = make_pattern({"1.4": "1.5", "1.4.2": "1.5.0"})
+        >>> pattern.findall(b"version = 1.4.2, 1.4")
+        [b'1.4.2', b'1.4']
     """
-    return [
-        PROJECT_ROOT / "pyproject.toml",
-    ]
+    finds = sorted(replacements, key=len, reverse=True)
 
+    return re.compile(b"|".join(re.escape(find.encode()) for find in finds))
 
-def main(find_str: str, replace_str: str):
-    """Find and replace instances of string
+
+def scan(file: Path, pattern: re.Pattern) -> set[bytes]:
+    """Find which strings of the pattern occur in file.
 
     Args:
-        find_str (str): Instances of string to be found.
-        replace_str (str): String to replace found instances.
+        file (Path): File to be scanned.
+        pattern (re.Pattern): Bytes pattern of find strings.
+
+    Returns:
+        set[bytes]: Find strings found in file.
     """
+    if file.stat().st_size == 0:
+        return set()
 
-    files_list = get_files()
+    with open(str(file), "rb") as f, mmap.mmap(
+        f.fileno(), 0, access=mmap.ACCESS_READ
+    ) as content:
+        return {match.group() for match in pattern.finditer(content)}
 
-    for file in files_list:
-        with open(str(file), "r") as f:
-            content = f.read()
-            if find_str not in content:
-                warnings.warn(f"{find_str} not found in {file}")
 
-                continue
+def rewrite(file: Path, pattern: re.Pattern, replacements: dict[str, str]) -> None:
+    """Replace all find strings in file and atomically replace it.
 
-        with open(str(file), "w") as f:
-            content = content.replace(find_str, replace_str)
+    Args:
+        file (Path): File to be changed.
+        pattern (re.Pattern): Bytes pattern of find strings.
+        replacements (dict[str, str]): Find strings mapped to their replacements.
+    """
+    encoded = {
+        find.encode(): replace.encode() for find, replace in replacements.items()
+    }
+
+    with open(str(file), "rb") as f:
+        content = pattern.sub(lambda match: encoded[match.group()], f.read())
+
+    file_descriptor, temp_name = tempfile.mkstemp(
+        dir=file.parent, prefix=f".{file.name}."
+    )
+    try:
+        with os.fdopen(file_descriptor, "wb") as f:
             f.write(content)
+        os.chmod(temp_name, file.stat().st_mode)
+        os.replace(temp_name, file)
+
+    except BaseException:
+        os.unlink(temp_name)
+        raise
+
+
+def main(
+    find_str: list[str],
+    replace_str: list[str],
+    globs: list[str] = DEFAULT_GLOBS,
+    path: Path = PROJECT_ROOT,
+):
+    """Find and replace instances of strings
+
+    Args:
+        find_str (list[str]): Instances of strings to be found.
+        replace_str (list[str]): Strings to replace found instances, paired with find_str.
+        globs (list[str], optional): Glob patterns of files to be changed. Defaults to DEFAULT_GLOBS.
+        path (Path, optional): Repository root path. Defaults to PROJECT_ROOT.
+    """
+    if len(find_str) != len(replace_str):
+        raise ValueError(
+            f"Got {len(find_str)} find strings and {len(replace_str)} replace strings"
+        )
+
+    replacements = {
+        find: replace for find, replace in zip(find_str, replace_str) if find != replace
+    }
+    if not replacements:
+        return
+
+    files_list = get_files(path, globs)
+    pattern = make_pattern(replacements)
+
+    # Threads overlap file I/O only: re holds the GIL while matching
+    with ThreadPoolExecutor() as executor:
+        found = dict(
+            zip(files_list, executor.map(lambda f: scan(f, pattern), files_list))
+        )
+        files_to_change = [file for file, matches in found.items() if matches]
+        list(executor.map(lambda f: rewrite(f, pattern, replacements), files_to_change))
+
+    found_any = set().union(*found.values())
+    for find in replacements:
+        if find.encode() not in found_any:
+            warnings.warn(f"{find} not found in {len(files_list)} files of {globs}")
 
 
 if __name__ == "__main__":
@@ -50,18 +154,28 @@ if __name__ == "__main__":
     parser.add_argument(
         "-f",
         "--find",
-        default=None,
+        action="append",
+        required=True,
         type=str,
-        help="Finds version instances of the format X.Y.Z",
+        help="Finds version instances of the format X.Y.Z. Can be repeated",
     )
     parser.add_argument(
         "-r",
         "--replace",
+        action="append",
+        required=True,
+        type=str,
+        help="Replace found instances. Must have the format X.Y.Z. Can be repeated, one for each --find",
+    )
+    parser.add_argument(
+        "-g",
+        "--glob",
+        action="append",
         default=None,
         type=str,
-        help="Replace found instances. Must have the format X.Y.Z",
+        help=f"Glob of files, relative to the repository root, to be changed. Can be repeated. Defaults to {DEFAULT_GLOBS}",
     )
 
     args = parser.parse_args()
 
-    main(args.find, args.replace)
+    main(args.find, args.replace, args.glob or DEFAULT_GLOBS)
@@ -0,0 +1,417 @@
+import re
+from dataclasses import asdict, dataclass, field, replace
+from datetime import date, datetime, tzinfo
+from pathlib import Path
+from typing import Union
+from zoneinfo import ZoneInfo
+
+import click
+import frontmatter
+import yaml
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+# Same file name pattern as Jekyll uses to accept posts
+POST_FILENAME = re.compile(r"^(\d{4}-\d{2}-\d{2})-(.*)\.(md|markdown|html)$")
+
+
+@dataclass
+class PostMeta:
+    path: str
+    date: datetime
+    tags: list[str] = field(default_factory=list)
+    categories: list[str] = field(default_factory=list)
+    hidden: bool = False
+    published: bool = True
+
+
+def get_terms(metadata: dict, key: str) -> list[str]:
+    """Get tags or categories from front matter, as Jekyll reads them.
+
+    Args:
+        metadata (dict): Post front matter.
+        key (str): Either "tags" or "categories".
+
+    Returns:
+        list[str]: Terms. A string is split on whitespace.
+
+    Example:
+        >>> get_terms({"tags": ["python", "digital signature"]}, "tags")
+        ['python', 'digital signature']
+        >>> get_terms({"categories": "coding statistics"}, "categories")
+        ['coding', 'statistics']
+        >>> get_terms({}, "tags")
+        []
+    """
+    terms = metadata.get(key) or []
+
+    if isinstance(terms, str):
+        return terms.split()
+
+    return [str(term) for term in terms]
+
+
+def get_date(metadata: dict, filename: str) -> datetime:
+    """Get post date from front matter, or from the filename otherwise.
+
+    Args:
+        metadata (dict): Post front matter.
+        filename (str): Post filename.
+
+    Returns:
+        datetime: Post date, with its timezone only if one was given.
+
+    Example:
+        >>> get_date({}, "2020-04-17-blog-post_bayes.md")
+        datetime.datetime(2020, 4, 17, 0, 0)
+        >>> get_date({"date": date(2020, 5, 21)}, "2020-04-17-blog-post_bayes.md")
+        datetime.datetime(2020, 5, 21, 0, 0)
+    """
+    value = metadata.get("date") or POST_FILENAME.match(filename).group(1)  # type: ignore
+
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+
+    if not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+
+    return value
+
+
+def get_timezone(config: dict) -> tzinfo:
+    """Site timezone, in which Jekyll reads post dates and build time.
+
+    Args:
+        config (dict): Site _config.yml.
+
+    Returns:
+        tzinfo: Configured timezone, or the local one when unset, as in Jekyll.
+
+    Example:
+        >>> get_timezone({"timezone": "Australia/Sydney"})
+        zoneinfo.ZoneInfo(key='Australia/Sydney')
+    """
+    if config.get("timezone"):
+        return ZoneInfo(config["timezone"])
+
+    return datetime.now().astimezone().tzinfo  # type: ignore
+
+
+def to_timezone(value: datetime, timezone: tzinfo) -> datetime:
+    """Express a post date in the site timezone.
+
+    Dates without timezone are taken as site time, as Jekyll does.
+
+    Args:
+        value (datetime): Post date.
+        timezone (tzinfo): Site timezone.
+
+    Returns:
+        datetime: Date in the site timezone.
+
+    Example:
+        >>> sydney = ZoneInfo("Australia/Sydney")
+        >>> to_timezone(datetime(2020, 1, 1), sydney).isoformat()
+        '2020-01-01T00:00:00+11:00'
+        >>> to_timezone(datetime.fromisoformat("2019-12-31T20:00:00+00:00"), sydney).year
+        2020
+    """
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone)
+
+    return value.astimezone(timezone)
+
+
+def get_post_meta(file: Path, path: Path = PROJECT_ROOT) -> PostMeta:
+    """Load archive fields of post front matter.
+
+    Args:
+        file (Path): Post file.
+        path (Path, optional): Site root path. Defaults to PROJECT_ROOT.
+
+    Returns:
+        PostMeta: Post archive fields.
+    """
+    with open(str(file)) as f:
+        metadata = frontmatter.load(f).metadata
+
+    return PostMeta(
+        path=file.relative_to(path).as_posix(),
+        date=get_date(metadata, file.name),
+        tags=get_terms(metadata, "tags"),
+        categories=get_terms(metadata, "categories"),
+        hidden=metadata.get("hidden") is True,
+        published=metadata.get("published", True) is not False,
+    )
+
+
+def load_posts(
+    path: Path = PROJECT_ROOT, cache: dict = {}
+) -> tuple[list[PostMeta], dict]:
+    """Load posts front matter, parsing only files changed since cache.
+
+    Args:
+        path (Path, optional): Site root path. Defaults to PROJECT_ROOT.
+        cache (dict, optional): Previous output cache. Defaults to {}.
+
+    Returns:
+        tuple[list[PostMeta], dict]: Posts and updated cache.
+    """
+    posts = []
+    new_cache = {}
+    for file in sorted((path / "_posts").glob("*")):
+        if not POST_FILENAME.match(file.name):
+            continue
+
+        stat = file.stat()
+        key = file.relative_to(path).as_posix()
+        entry = cache.get(key, {})
+
+        if (entry.get("mtime"), entry.get("size")) == (stat.st_mtime_ns, stat.st_size):
+            post = PostMeta(**entry["post"])
+
+        else:
+            post = get_post_meta(file, path)
+
+        new_cache[key] = {
+            "mtime": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "post": asdict(post),
+        }
+        posts.append(post)
+
+    return posts, new_cache
+
+
+def sort_posts(
+    posts: list[PostMeta], now: datetime, future: bool = False
+) -> list[PostMeta]:
+    """Published posts in the same order as site.posts.
+
+    Args:
+        posts (list[PostMeta]): Posts.
+        now (datetime): Build time, with timezone.
+        future (bool, optional): Whether future posts are published. Defaults to False.
+
+    Returns:
+        list[PostMeta]: Posts, newest first, dated in the timezone of now.
+
+    Example:
+        >>> now = datetime(2020, 1, 1, 12, tzinfo=ZoneInfo("Australia/Sydney"))
+        >>> posts = [
+        ...     PostMeta("_posts/a.md", datetime(2020, 1, 1)),
+        ...     PostMeta("_posts/b.md", datetime.fromisoformat("2020-01-01T09:00:00+00:00")),
+        ... ]
+        >>> [post.path for post in sort_posts(posts, now)]
+        ['_posts/a.md']
+    """
+    posts = [replace(post, date=to_timezone(post.date, now.tzinfo)) for post in posts]  # type: ignore
+    published = [
+        post for post in posts if post.published and (future or post.date <= now)
+    ]
+
+    return sorted(published, key=lambda post: (post.date, post.path), reverse=True)
+
+
+def make_entry(post: PostMeta, index: int) -> dict:
+    """Reference to a post in site.posts.
+
+    Args:
+        post (PostMeta): Post.
+        index (int): Position of post in site.posts.
+
+    Returns:
+        dict: Index and path, to check the index against.
+    """
+    return {"index": index, "path": post.path}
+
+
+def make_terms_archive(posts: list[PostMeta], key: str) -> list[dict]:
+    """Group posts by tag or category.
+
+    Terms are sorted by number of posts, ties in the order Jekyll first meets
+    them, i.e. from the oldest post. Posts are listed newest first.
+
+    Args:
+        posts (list[PostMeta]): Posts, as returned by sort_posts.
+        key (str): Either "tags" or "categories".
+
+    Returns:
+        list[dict]: Terms with name, count and posts.
+
+    Example:
+        >>> posts = [
+        ...     PostMeta("_posts/b.md", datetime(2021, 1, 1), tags=["git", "python"]),
+        ...     PostMeta("_posts/a.md", datetime(2020, 1, 1), tags=["python"]),
+        ... ]
+        >>> make_terms_archive(posts, "tags")
+        [{'name': 'python', 'count': 2, 'posts': [{'index': 0, 'path': '_posts/b.md'}, {'index': 1, 'path': '_posts/a.md'}]}, {'name': 'git', 'count': 1, 'posts': [{'index': 0, 'path': '_posts/b.md'}]}]
+    """
+    terms = {}
+    for index in reversed(range(len(posts))):
+        for term in getattr(posts[index], key):
+            terms.setdefault(term, []).append(make_entry(posts[index], index))
+
+    archive = [
+        {"name": term, "count": len(entries), "posts": entries[::-1]}
+        for term, entries in terms.items()
+    ]
+
+    return sorted(archive, key=lambda term: term["count"], reverse=True)
+
+
+def make_year_archive(posts: list[PostMeta]) -> list[dict]:
+    """Group posts, but the hidden ones, by year.
+
+    Args:
+        posts (list[PostMeta]): Posts, as returned by sort_posts.
+
+    Returns:
+        list[dict]: Years with name, count and posts, newest first.
+
+    Example:
+        >>> posts = [
+        ...     PostMeta("_posts/c.md", datetime(2021, 1, 1)),
+        ...     PostMeta("_posts/b.md", datetime(2020, 6, 1), hidden=True),
+        ...     PostMeta("_posts/a.md", datetime(2020, 1, 1)),
+        ... ]
+        >>> [(year["name"], year["count"]) for year in make_year_archive(posts)]
+        [('2021', 1), ('2020', 1)]
+    """
+    years = {}
+    for index, post in enumerate(posts):
+        if not post.hidden:
+            years.setdefault(str(post.date.year), []).append(make_entry(post, index))
+
+    return [
+        {"name": year, "count": len(entries), "posts": entries}
+        for year, entries in years.items()
+    ]
+
+
+def make_fingerprint(posts: list[PostMeta]) -> str:
+    """Everything the archives depend on, as _includes/archive-data-check.html
+    renders it from site.posts.
+
+    Liquid on GitHub Pages has no hash filter, so the fingerprint is compared
+    as it is rather than as a digest. It changes when a post is added, removed,
+    moved in order, hidden, or has its year, tags or categories edited.
+
+    Args:
+        posts (list[PostMeta]): Posts, as returned by sort_posts.
+
+    Returns:
+        str: One "path|year|hidden|tags|categories;" record per post.
+
+    Example:
+        >>> posts = [
+        ...     PostMeta("_posts/b.md", datetime(2021, 1, 1), tags=["git", "python"]),
+        ...     PostMeta("_posts/a.md", datetime(2020, 1, 1), categories=["coding"], hidden=True),
+        ... ]
+        >>> make_fingerprint(posts)
+        '_posts/b.md|2021||git,python|;_posts/a.md|2020|hidden||coding;'
+    """
+    return "".join(
+        f"{post.path}|{post.date.year}|{'hidden' if post.hidden else ''}"
+        f"|{','.join(post.tags)}|{','.join(post.categories)};"
+        for post in posts
+    )
+
+
+def make_archives(posts: list[PostMeta]) -> dict[str, Union[list, dict]]:
+    """All archives written to _data, keyed by file name.
+
+    Besides the archives, _data/archives.yml holds the fingerprint of posts, so
+    that layouts can tell when the data no longer matches site.posts.
+
+    Args:
+        posts (list[PostMeta]): Posts, as returned by sort_posts.
+
+    Returns:
+        dict[str, Union[list, dict]]: Data of each file.
+
+    Example:
+        >>> posts = [PostMeta("_posts/a.md", datetime(2020, 1, 1), tags=["python"])]
+        >>> make_archives(posts)["archives"]
+        {'fingerprint': '_posts/a.md|2020||python|;'}
+    """
+    return {
+        "archives": {"fingerprint": make_fingerprint(posts)},
+        "tags": make_terms_archive(posts, "tags"),
+        "categories": make_terms_archive(posts, "categories"),
+        "years": make_year_archive(posts),
+    }
+
+
+def write_yaml(data: Union[list, dict], file: Path, check: bool = False) -> bool:
+    """Write data to yaml file, unless its content is unchanged.
+
+    Args:
+        data (Union[list, dict]): Data to be written.
+        file (Path): Yaml file.
+        check (bool, optional): Only compare, without writing. Defaults to False.
+
+    Returns:
+        bool: Whether the file content differs from data.
+    """
+    content = yaml.dump(data, sort_keys=False, allow_unicode=True)
+
+    if file.exists() and file.read_text() == content:
+        return False
+
+    if not check:
+        file.write_text(content)
+
+    return True
+
+
+@click.command()
+@click.option("--path", "-p", help="Site root path", type=Path, default=PROJECT_ROOT)
+@click.option("--future", "-f", help="Include posts dated in the future", is_flag=True)
+@click.option(
+    "--check", "-c", help="Fail if _data is out of date, without writing", is_flag=True
+)
+def main(path: Path = PROJECT_ROOT, future: bool = False, check: bool = False):
+    """Precompute tag, category and year archives into _data.
+
+    Args:
+        path (Path, optional): Site root path. Defaults to PROJECT_ROOT.
+        future (bool, optional): Include posts dated in the future. Defaults to False.
+        check (bool, optional): Fail if _data is out of date, without writing. Defaults to False.
+
+    Raises:
+        click.ClickException: With check, if any _data file is out of date.
+    """
+    with open(str(path / "_config.yml")) as f:
+        config = yaml.safe_load(f)
+
+    future = future or bool(config.get("future", False))
+
+    cache_file = path / ".archives-cache.yml"
+    cache = yaml.safe_load(cache_file.read_text()) if cache_file.exists() else {}
+
+    posts, cache = load_posts(path, cache or {})
+    posts = sort_posts(posts, datetime.now(get_timezone(config)), future)
+
+    stale = [
+        f"_data/{name}.yml"
+        for name, data in make_archives(posts).items()
+        if write_yaml(data, path / "_data" / f"{name}.yml", check)
+    ]
+
+    if check:
+        if stale:
+            raise click.ClickException(
+                f"{', '.join(stale)} out of date in {path}. Run make archives"
+            )
+
+        return
+
+    for file in stale:
+        print(f"Updated {file}")
+
+    cache_file.write_text(yaml.dump(cache))
+
+
+if __name__ == "__main__":
+    main()
@@ -18,6 +18,7 @@ PROJECT_ROOT = Path(__file__).resolve().parents[2]
 sys.path.append(str(PROJECT_ROOT))
 
 import python.features.build_features as bf
+from python.data.make_archives import get_terms
 
 
 class Prepender:
@@ -110,6 +111,24 @@ def get_post(filename: str, path: Path = PROJECT_ROOT / "_posts") -> tuple[str,
     return post.content, post.metadata
 
 
+def get_tags_vocabulary(path: Path = PROJECT_ROOT / "_posts") -> list[str]:
+    """Get tags already used in posts.
+
+    Args:
+        path (Path, optional): Posts folder. Defaults to PROJECT_ROOT / "_posts".
+
+    Returns:
+        list[str]: Tags sorted by number of posts using them.
+    """
+    tags_count = {}
+    for file in sorted(path.glob("*.md")):
+        _, metadata = get_post(file.name, path)
+        for tag in get_terms(metadata, "tags"):
+            tags_count[tag] = tags_count.get(tag, 0) + 1
+
+    return sorted(tags_count, key=tags_count.get, reverse=True)
+
+
 def get_title(post: str) -> str:
     """Get title of post. Where it is assumed to be the first line.
 
@@ -142,11 +161,19 @@ def make_post(frontpage: dict):
     "--categories", "-c", help="Post categories", type=Iterable[str], required=False
 )
 @click.option("--n_tags", "-n", help="Number of tags", type=int, required=False)
+@click.option(
+    "--chunk_size",
+    "-s",
+    help="Count n-grams of posts longer than this number of characters by chunks in parallel",
+    type=int,
+    required=False,
+)
 def main(
     filename: str,
     date: datetime = None,  # type: ignore
     categories: Iterable[str] = [],
     n_tags: int = 5,
+    chunk_size: int = None,  # type: ignore
 ):
     date = date or datetime.now().date()
 
@@ -154,7 +181,14 @@ def main(
     title = get_title(content)
 
     if not front_page:
-        front_page = bf.main(content, date, title, categories)
+        front_page = bf.main(
+            content,
+            date,
+            title,
+            categories,
+            existing_tags=get_tags_vocabulary(),
+            chunk_size=chunk_size,
+        )
 
     post = Post(
         title=title,
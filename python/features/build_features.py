@@ -1,9 +1,14 @@
+import os
+import re
 import sys
+import warnings
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
+from typing import Generator
 
 from nltk.corpus import stopwords
-from nltk.tokenize import sent_tokenize
 from transformers import pipeline
 
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
@@ -55,27 +60,313 @@ def make_front_page(
     }
 
 
-def main(post: str, date: datetime, title: str, categories: list[str]):
+def find_cut(line: str, start: int, limit: int) -> int:
+    """First position from start where line can be cut without changing filtering.
+
+    Sentence ends are preferred. Otherwise the cut follows a non-letter
+    character outside links, which the filter turns into a word separator.
+
+    Args:
+        line (str): Line without backticks or square brackets.
+        start (int): Position from which to look for a cut.
+        limit (int): Number of characters after start to look for a sentence end.
+
+    Returns:
+        int: Cut position, or len(line) if there is none.
+
+    Example:
+        >>> find_cut("Lorem ipsum. Dolor sit amet.", 3, 20)
+        13
+        >>> find_cut("Lorem ipsum. Dolor sit amet.", 3, 5)
+        6
+        >>> find_cut("abc/def+ghi", 3, 5)
+        4
+        >>> find_cut("see http://a.b/c/d then/more", 6, 5)
+        19
+    """
+    sentence_end = re.compile(r"[.!?]\s+").search(line, start)
+    if sentence_end and sentence_end.end() - start <= limit:
+        return sentence_end.end()
+
+    for match in re.finditer(r"[^a-zA-Z]", line[start:]):
+        cut = start + match.end()
+        run_start = max(line.rfind(" ", 0, cut), line.rfind("\t", 0, cut)) + 1
+        run_end = re.compile(r"\s").search(line, cut)
+        run = line[run_start : run_end.start() if run_end else len(line)]
+        if "http" not in run:
+            return cut
+
+    return len(line)
+
+
+def split_paragraph(paragraph: str, chunk_size: int) -> list[str]:
+    """Split paragraph outside code blocks at lines and sentences.
+
+    Lines with inline code or links, which filter rules match within a line,
+    are kept whole.
+
+    Args:
+        paragraph (str): Paragraph without code fences.
+        chunk_size (int): Approximate number of characters of each piece.
+
+    Returns:
+        list[str]: Pieces, which join back to paragraph.
+
+    Example:
+        >>> split_paragraph("Lorem ipsum. Dolor sit.\\nAmet `x. y` z.", 10)
+        ['Lorem ipsum. ', 'Dolor sit.\\n', 'Amet `x. y` z.']
+    """
+    pieces = []
+    for line in re.split(r"(?<=\n)", paragraph):
+        if pieces and line.lstrip().startswith("["):
+            pieces[-1] += line
+            continue
+
+        if "`" in line or "[" in line:
+            pieces.append(line)
+            continue
+
+        start = 0
+        while len(line) - start > chunk_size:
+            cut = find_cut(line, start + chunk_size, chunk_size)
+            pieces.append(line[start:cut])
+            start = cut
+
+        if line[start:]:
+            pieces.append(line[start:])
+
+    return pieces
+
+
+def split_post(post: str, chunk_size: int) -> list[str]:
+    """Split post into chunks of about chunk_size characters.
+
+    Chunks end at paragraph boundaries outside code blocks. Paragraphs longer
+    than chunk_size are split at lines, sentences or, for text without
+    sentences such as embedded data, at non-letter characters, so that no
+    filter rule matches across chunks.
+
+    Args:
+        post (str): Post content.
+        chunk_size (int): Minimum number of characters of each chunk, but the last.
+
+    Returns:
+        list[str]: Chunks, which join back to post.
+
+    Example:
+        >>> split_post("Lorem ipsum.\\n\\nDolor sit.\\n\\nAmet.", 10)
+        ['Lorem ipsum.\\n\\n', 'Dolor sit.\\n\\n', 'Amet.']
+        >>> split_post("Lorem\\n\\n```python\\na = 1\\n\\nb = 2\\n```\\n\\nipsum", 1)
+        ['Lorem\\n\\n', '```python\\na = 1\\n\\nb = 2\\n```\\n\\n', 'ipsum']
+        >>> split_post("Lorem ipsum. Dolor sit. Amet consectetur.", 10)
+        ['Lorem ipsum. ', 'Dolor sit. ', 'Amet consectetur.']
+    """
+    chunks = []
+    chunk = ""
+    fences = 0
+    for index, piece in enumerate(re.split(r"(\n\s*\n)", post)):
+        is_separator = index % 2 == 1
+        if is_separator or fences % 2 == 1 or "```" in piece:
+            segments = [piece]
+
+        else:
+            segments = split_paragraph(piece, chunk_size)
+
+        # Whole paragraphs are only cut after the separator that follows them
+        for position, segment in enumerate(segments, start=1 - is_separator):
+            chunk += segment
+            fences += segment.count("```")
+            is_cut = position < len(segments)
+            if is_cut and len(chunk) >= chunk_size and fences % 2 == 0:
+                chunks.append(chunk)
+                chunk = ""
+
+    if chunk:
+        chunks.append(chunk)
+
+    return chunks
+
+
+def count_chunk(chunk: str, context: int) -> tuple[Counter, list[str], list[str]]:
+    """Count n-grams of a chunk of post.
+
+    Args:
+        chunk (str): Chunk of post content.
+        context (int): Number of tokens at each end of the chunk to be returned.
+
+    Returns:
+        tuple[Counter, list[str], list[str]]: n-gram counts, first and last context tokens.
+    """
+    vocabulary = tf.Vocabulary()
+    content_filter = tf.RegexContentFilter().make()
+    lemmatizer = tf.LemmatizeContent(vocabulary=vocabulary)
+    count_vectorizer = tf.CountVectorizer(
+        **DEFAULT_SETTINGS["CountVectorizer"],  # type: ignore
+        token_vocabulary=vocabulary,
+    )
+
+    ids = lemmatizer.make(content_filter.get(chunk)).get()
+    ids = count_vectorizer.analyze_ids(ids)
+    counts = Counter(
+        {gram: int(count) for count, gram in count_vectorizer.count_analyzed_ids(ids)}
+    )
+    tokens = vocabulary.decode(ids[:context]), vocabulary.decode(
+        ids[len(ids) - context :]
+    )
+
+    return counts, *tokens
+
+
+def count_boundary(
+    left: list[str], right: list[str], ngram_range: tuple[int, int]
+) -> Counter:
+    """Count n-grams starting in left and ending in right.
+
+    Args:
+        left (list[str]): Tokens before the boundary.
+        right (list[str]): Tokens after the boundary.
+        ngram_range (tuple[int, int]): Minimum and maximum n-gram length.
+
+    Returns:
+        Counter: n-gram counts.
+
+    Example:
+        >>> sorted(count_boundary(["lorem", "ipsum"], ["dolor", "sit"], (1, 3)).items())
+        [('ipsum dolor', 1), ('ipsum dolor sit', 1), ('lorem ipsum dolor', 1)]
+    """
+    min_n, max_n = ngram_range
+    tokens = left + right
+
+    counts = Counter()
+    for n in range(max(min_n, 2), max_n + 1):
+        for start in range(max(len(left) - n + 1, 0), len(left)):
+            if start + n <= len(tokens):
+                counts[" ".join(tokens[start : start + n])] += 1
+
+    return counts
+
+
+def count_ngrams(post: str) -> list[tuple[int, str]]:
+    """Count n-grams of post in a single pass.
+
+    Args:
+        post (str): Post content.
+
+    Returns:
+        list[tuple[int, str]]: Pairs of (count, n-gram), most frequent first.
+    """
+    vocabulary = tf.Vocabulary()
 
     n_grams_steps = [
         ("RegexContentFilter", tf.RegexContentFilter()),
-        ("LemmatizeContent", tf.LemmatizeContent()),
-        ("Tokenizer", tf.Tokenizer(sent_tokenize)),
+        ("LemmatizeContent", tf.LemmatizeContent(vocabulary=vocabulary)),
         (
             "CountVectorizer",
-            tf.CountVectorizer(**DEFAULT_SETTINGS["CountVectorizer"]),  # type: ignore
+            tf.CountVectorizer(
+                **DEFAULT_SETTINGS["CountVectorizer"],  # type: ignore
+                token_vocabulary=vocabulary,
+            ),
         ),
     ]
 
     n_grams_pipeline = tf.Pipeline(n_grams_steps)
 
     _ = n_grams_pipeline.make(post)
-    ngrams = n_grams_pipeline.get(post)
+
+    return n_grams_pipeline.get(post)
+
+
+def iter_chunk_counts(
+    post: str, chunk_size: int, max_workers: int = None  # type: ignore
+) -> Generator[Counter, None, None]:
+    """Count n-grams of a long post by chunks in a process pool.
+
+    Each chunk yields its n-gram counts together with the n-grams that cross
+    the boundary with the previous chunk. At most two chunks per process are
+    counted ahead, so memory does not grow with the number of chunks.
+
+    Args:
+        post (str): Post content.
+        chunk_size (int): Minimum number of characters of each chunk.
+        max_workers (int, optional): Number of processes. Defaults to the number of CPUs.
+
+    Yields:
+        Counter: n-gram counts of each chunk.
+    """
+    ngram_range = DEFAULT_SETTINGS["CountVectorizer"]["ngram_range"]
+    context = ngram_range[1] - 1
+
+    chunks = split_post(post, chunk_size)
+    batch_size = 2 * (max_workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        previous = []
+        for start in range(0, len(chunks), batch_size):
+            batch = chunks[start : start + batch_size]
+            for counts, head, tail in executor.map(
+                count_chunk, batch, [context] * len(batch)
+            ):
+                counts.update(count_boundary(previous, head, ngram_range))  # type: ignore
+                previous = (previous + tail)[-context:] if context else []
+
+                yield counts
+
+
+def count_ngrams_chunked(
+    post: str, chunk_size: int, max_workers: int = None  # type: ignore
+) -> list[tuple[int, str]]:
+    """Exact n-gram counts of a long post, added up from iter_chunk_counts.
+
+    The result is the same as the single pass n-grams pipeline.
+
+    Args:
+        post (str): Post content.
+        chunk_size (int): Minimum number of characters of each chunk.
+        max_workers (int, optional): Number of processes. Defaults to the number of CPUs.
+
+    Returns:
+        list[tuple[int, str]]: Pairs of (count, n-gram), most frequent first.
+
+    Example:
+        >>> post = "Lorem ipsum dolor.\\n\\n```python\\na = 1\\n```\\n\\nLorem ipsum dolor sit amet."
+        >>> count_ngrams_chunked(post, 10, max_workers=2) == count_ngrams(post)
+        True
+    """
+    counts = Counter()
+    for chunk_counts in iter_chunk_counts(post, chunk_size, max_workers):
+        counts.update(chunk_counts)
+
+    return sorted(((count, gram) for gram, count in counts.items()), reverse=True)
+
+
+def main(
+    post: str,
+    date: datetime,
+    title: str,
+    categories: list[str],
+    existing_tags: list[str] = [],
+    chunk_size: int = None,  # type: ignore
+):
+    if chunk_size and len(post) > chunk_size:
+        # Partial counts of each chunk are streamed into the Space-Saving
+        # counter of Tags, so only its capacity is kept across chunks
+        ngrams = (
+            (count, gram)
+            for counts in iter_chunk_counts(post, chunk_size)
+            for gram, count in counts.items()
+        )
+
+    else:
+        ngrams = count_ngrams(post)
 
     tags = tf.Tags(5)
     _ = tags.make(ngrams)
     post_tags = tags.get(ngrams)
 
+    canonical_tags = tf.CanonicalTags(existing_tags)
+    post_tags = canonical_tags.get(post_tags)
+    for tag, suggestion in canonical_tags.suggestions.items():
+        warnings.warn(f"Tag '{tag}' is close to existing tag '{suggestion}'")
+
     summarize_text_steps = [
         ("RegexContentFilter", tf.RegexContentFilter()),
         ("GenText", tf.GenText(pipeline("text-generation", model="gpt2"))),
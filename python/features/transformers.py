@@ -1,13 +1,14 @@
 from __future__ import annotations  # Necessary for self typehint
 
+import heapq
 import re
+import warnings
 from abc import ABC, abstractmethod
 from collections.abc import Iterable
 from typing import Callable, Generator, Union
 
 import nltk
 import numpy as np
-import pandas as pd
 from nltk.corpus import stopwords
 from nltk.stem.wordnet import WordNetLemmatizer
 from sklearn.feature_extraction.text import CountVectorizer as SKLCountVectorizer
@@ -26,16 +27,91 @@ class Meta(ABC):
         pass
 
 
+class Vocabulary:
+    """Interned mapping between tokens and integer ids.
+
+    Example:
+        >>> vocabulary = Vocabulary()
+        >>> vocabulary.encode(["lorem", "ipsum", "lorem"]).tolist()
+        [0, 1, 0]
+        >>> vocabulary.decode([1, 0])
+        ['ipsum', 'lorem']
+        >>> len(vocabulary)
+        2
+    """
+
+    def __init__(self) -> None:
+        self.ids = {}
+        self.tokens = []
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def add(self, token: str) -> int:
+        """Get id of token, adding it to the vocabulary if it is new.
+
+        Args:
+            token (str): Token.
+
+        Returns:
+            int: Token id.
+        """
+        try:
+            return self.ids[token]
+
+        except KeyError:
+            self.ids[token] = len(self.tokens)
+            self.tokens.append(token)
+
+            return self.ids[token]
+
+    def encode(self, tokens: Iterable[str]) -> np.ndarray:
+        """Convert tokens to ids.
+
+        Args:
+            tokens (Iterable[str]): Tokens.
+
+        Returns:
+            np.ndarray: Array of int32 token ids.
+        """
+        return np.fromiter((self.add(token) for token in tokens), dtype=np.int32)
+
+    def decode(self, ids: Iterable[int]) -> list[str]:
+        """Convert ids to tokens.
+
+        Args:
+            ids (Iterable[int]): Token ids.
+
+        Returns:
+            list[str]: Tokens.
+        """
+        return [self.tokens[idx] for idx in ids]
+
+
 class CountVectorizer(Meta, SKLCountVectorizer):
     """Get count vector of ngrams in text.
 
+    Text is either a collection of documents or, when token_vocabulary is
+    given, an array of token ids encoded with it. In the latter case n-grams
+    are counted directly on the ids, without joining and re-tokenizing text.
+
     Example:
         >>> text = ("Lorem ipsum dolor sit amet.",
         ... "Lorem dolor Tincidunt praesent semper")
         >>> cv = CountVectorizer()
         >>> _ = cv.make(text)
-        >>> list(cv.get(text))
-        [(1, 'amet'), (2, 'dolor'), (1, 'ipsum'), (2, 'lorem'), (1, 'praesent'), (1, 'semper'), (1, 'sit'), (1, 'tincidunt')]
+        >>> [(int(count), gram) for count, gram in cv.get(text)]
+        [(2, 'lorem'), (2, 'dolor'), (1, 'tincidunt'), (1, 'sit'), (1, 'semper'), (1, 'praesent'), (1, 'ipsum'), (1, 'amet')]
+        >>> vocabulary = Vocabulary()
+        >>> ids = vocabulary.encode("Lorem ipsum the dolor lorem ipsum".split())
+        >>> cv = CountVectorizer(stop_words=["the"], ngram_range=(1, 2), token_vocabulary=vocabulary)
+        >>> _ = cv.make(ids)
+        >>> [(int(count), gram) for count, gram in cv.get(ids)]
+        [(2, 'lorem ipsum'), (2, 'lorem'), (2, 'ipsum'), (1, 'ipsum dolor'), (1, 'dolor lorem'), (1, 'dolor')]
+        >>> CountVectorizer().get(ids)
+        Traceback (most recent call last):
+        ...
+        ValueError: Counting token ids requires token_vocabulary
     """
 
     def __init__(
@@ -48,7 +124,7 @@ class CountVectorizer(Meta, SKLCountVectorizer):
         preprocessor=None,
         tokenizer=None,
         stop_words=None,
-        token_pattern="(?u)\b\w\w+\b",
+        token_pattern=r"(?u)\b\w\w+\b",
         ngram_range=(1, 1),
         analyzer="word",
         max_df=1.0,
@@ -57,25 +133,139 @@ class CountVectorizer(Meta, SKLCountVectorizer):
         vocabulary=None,
         binary=False,
         dtype=np.int64,
+        token_vocabulary: Vocabulary = None,  # type: ignore
     ) -> None:
         """
         Args:
             See [1]
+            token_vocabulary (Vocabulary, optional): Vocabulary of token ids passed to get. Defaults to None.
 
         References:
             [1] https://scikit-learn.org/stable/modules/generated/sklearn.feature_extraction.text.CountVectorizer.html
         """
-        super().__init__()
+        super().__init__(
+            input=input,
+            encoding=encoding,
+            decode_error=decode_error,
+            strip_accents=strip_accents,
+            lowercase=lowercase,
+            preprocessor=preprocessor,
+            tokenizer=tokenizer,
+            stop_words=stop_words,
+            token_pattern=token_pattern,
+            ngram_range=ngram_range,
+            analyzer=analyzer,
+            max_df=max_df,
+            min_df=min_df,
+            max_features=max_features,
+            vocabulary=vocabulary,
+            binary=binary,
+            dtype=dtype,
+        )
+        self.token_vocabulary = token_vocabulary
 
     def make(self, text: str) -> CountVectorizer:
         return self
 
     def get(self, text: str) -> Iterable[tuple[int, str]]:
+        if isinstance(text, np.ndarray):
+            if self.token_vocabulary is None:
+                raise ValueError("Counting token ids requires token_vocabulary")
+
+            return self.count_ids(text)
+
         self.fit(text)
         count_array = self.transform(text).sum(axis=0)
         count_array = np.asarray(count_array).reshape(-1)
         return sorted(zip(count_array, self.get_feature_names_out()), reverse=True)
 
+    def analyze_ids(self, ids: np.ndarray) -> np.ndarray:
+        """Apply preprocessing, tokenization and stop words to token ids.
+
+        Each distinct token of ids is analyzed once, instead of once per
+        occurrence in the text. A token may be split into several tokens or
+        dropped altogether, as the sklearn analyzer would do.
+
+        Args:
+            ids (np.ndarray): Token ids.
+
+        Returns:
+            np.ndarray: Ids of analyzed tokens.
+        """
+        preprocess = self.build_preprocessor()
+        tokenize = self.build_tokenizer()
+        stop_words = set(self.get_stop_words() or [])
+
+        unique, inverse = np.unique(ids, return_inverse=True)
+        analyzed = []
+        for idx in unique:
+            tokens = tokenize(preprocess(self.token_vocabulary.tokens[idx]))
+            analyzed.append(
+                [self.token_vocabulary.add(t) for t in tokens if t not in stop_words]
+            )
+
+        lengths = np.array([len(tokens) for tokens in analyzed], dtype=np.int64)
+        offsets = np.cumsum(lengths) - lengths
+        flat = np.fromiter(
+            (idx for tokens in analyzed for idx in tokens),
+            dtype=np.int32,
+            count=lengths.sum(),
+        )
+
+        counts = lengths[inverse]
+        starts = np.repeat(offsets[inverse] - (np.cumsum(counts) - counts), counts)
+
+        return flat[starts + np.arange(counts.sum())]
+
+    def count_ids(self, ids: np.ndarray) -> Iterable[tuple[int, str]]:
+        """Count n-grams of token ids.
+
+        Args:
+            ids (np.ndarray): Token ids encoded with token_vocabulary.
+
+        Returns:
+            Iterable[tuple[int, str]]: Pairs of (count, n-gram), most frequent first.
+        """
+        return self.count_analyzed_ids(self.analyze_ids(ids))
+
+    def count_analyzed_ids(self, ids: np.ndarray) -> Iterable[tuple[int, str]]:
+        """Count n-grams of token ids returned by analyze_ids.
+
+        Ids are first remapped to a dense range, so that n-gram codes depend on
+        the number of distinct tokens of the text only. N-grams whose codes do
+        not fit in int64 are counted as rows of token ids instead.
+
+        Args:
+            ids (np.ndarray): Analyzed token ids.
+
+        Returns:
+            Iterable[tuple[int, str]]: Pairs of (count, n-gram), most frequent first.
+        """
+        unique, dense = np.unique(ids, return_inverse=True)
+        base = max(len(unique), 1)
+        min_n, max_n = self.ngram_range
+
+        output = []
+        for n in range(min_n, max_n + 1):
+            if base**n <= np.iinfo(np.int64).max:
+                ngrams = NGrams(n_grams=n, base=base)
+                codes, counts = np.unique(ngrams.get(dense), return_counts=True)
+                grams = ngrams.decode(codes)
+
+            elif len(dense) >= n:
+                windows = np.lib.stride_tricks.sliding_window_view(dense, n)
+                grams, counts = np.unique(windows, axis=0, return_counts=True)
+
+            else:
+                continue
+
+            output.extend(
+                (count, " ".join(self.token_vocabulary.decode(unique[gram])))
+                for count, gram in zip(counts, grams)
+            )
+
+        return sorted(output, reverse=True)
+
 
 class Pipeline:
     """Text processing pipeline
@@ -241,6 +431,10 @@ class Tokenizer(Meta):
 class NGrams(Meta):
     """Make n-grams, given a words list.
 
+    An array of token ids is turned into one int64 code per n-gram, rolling
+    the ids in base `base`, so that n-grams can be counted with numpy. The
+    base must be given for ids, so that codes of every call decode alike.
+
     Example:
         >>> text = "Lorem ipsum dolor sit"
         >>> words_list = text.split()
@@ -249,15 +443,29 @@ class NGrams(Meta):
         >>> ngrams_obj = ngrams.get(words_list)
         >>> [gram for gram in ngrams_obj] == [('Lorem', 'ipsum'), ('ipsum', 'dolor'), ('dolor', 'sit')]
         True
+        >>> ngrams = NGrams(n_grams=2, base=4)
+        >>> codes = ngrams.get(np.array([0, 1, 2, 3], dtype=np.int32))
+        >>> codes.tolist()
+        [1, 6, 11]
+        >>> ngrams.decode(codes).tolist()
+        [[0, 1], [1, 2], [2, 3]]
+        >>> ngrams.decode(ngrams.get(np.array([3, 0, 3]))).tolist()
+        [[3, 0], [0, 3]]
+        >>> NGrams(n_grams=2).get(np.array([0, 1, 0]))
+        Traceback (most recent call last):
+        ...
+        ValueError: base is required to encode token ids
     """
 
-    def __init__(self, n_grams: int = 1):
+    def __init__(self, n_grams: int = 1, base: int = None):  # type: ignore
         """Make n-grams, given a words list.
 
         Args:
             n_grams (int, optional): n-grams length. Defaults to 1.
+            base (int, optional): Number of distinct token ids, required for token ids. Defaults to None.
         """
         self.n_grams = n_grams
+        self.base = base
 
     def make(self, text: str = "") -> NGrams:
         """Make n-grams, given a words list.
@@ -267,21 +475,228 @@ class NGrams(Meta):
         """
         return self
 
-    def get(self, words_list: list[str]) -> Generator:
+    def get(
+        self, words_list: Union[list[str], np.ndarray]
+    ) -> Union[Generator, np.ndarray]:
         """Returns n-grams
 
         Args:
-            words_list (list[str]): List of words.
+            words_list (Union[list[str], np.ndarray]): List of words or array of token ids.
 
         Returns:
-            Generator: n-grams
+            Union[Generator, np.ndarray]: n-grams, or n-gram codes for token ids.
         """
+        if isinstance(words_list, np.ndarray):
+            return self.encode(words_list)
+
         return nltk.ngrams(words_list, self.n_grams)
 
+    def encode(self, ids: np.ndarray) -> np.ndarray:
+        """Returns n-gram codes of token ids.
+
+        Args:
+            ids (np.ndarray): Token ids.
+
+        Returns:
+            np.ndarray: int64 code of each n-gram.
+
+        Raises:
+            ValueError: If base is not set, or ids do not fit in it.
+        """
+        ids = ids.astype(np.int64)
+        if self.base is None:
+            raise ValueError("base is required to encode token ids")
+
+        if ids.size and (ids.min() < 0 or ids.max() >= self.base):
+            raise ValueError(f"Token ids must be in [0, {self.base})")
+
+        if self.base**self.n_grams > np.iinfo(np.int64).max:
+            raise ValueError(
+                f"{self.n_grams}-grams of {self.base} tokens do not fit in int64"
+            )
+
+        n_windows = max(ids.size - self.n_grams + 1, 0)
+        codes = np.zeros(n_windows, dtype=np.int64)
+        for k in range(self.n_grams):
+            codes = codes * self.base + ids[k : k + n_windows]
+
+        return codes
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        """Returns token ids of n-gram codes.
+
+        Args:
+            codes (np.ndarray): n-gram codes.
+
+        Returns:
+            np.ndarray: Array of shape (len(codes), n_grams) with token ids.
+        """
+        powers = self.base ** np.arange(self.n_grams - 1, -1, -1, dtype=np.int64)
+
+        return (codes[:, np.newaxis] // powers) % self.base
+
+
+class SpaceSaving:
+    """Approximate counts of the most frequent items in a stream.
+
+    At most capacity items are monitored. An unmonitored item replaces the
+    least counted one and inherits its count as error, so that each
+    reported count is between the true count and the true count plus its
+    error, and every item more frequent than total / capacity is monitored.
+
+    Example:
+        >>> counter = SpaceSaving(capacity=2)
+        >>> for item in ["a", "b", "a", "c", "a"]:
+        ...     counter.update(item)
+        >>> counter.top(2)
+        [(3, 'a'), (2, 'c')]
+        >>> counter.errors["c"], counter.total
+        (1, 5)
+
+    References:
+        [1] Metwally, Agrawal and El Abbadi, "Efficient Computation of Frequent and Top-k Elements in Data Streams", 2005.
+    """
+
+    def __init__(self, capacity: int = 1000) -> None:
+        """
+        Args:
+            capacity (int, optional): Maximum number of monitored items. Defaults to 1000.
+        """
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        self.total = 0
+        self.heap = []
+
+    def update(self, item: str, count: int = 1) -> None:
+        """Add count occurrences of item.
+
+        Args:
+            item (str): Item.
+            count (int, optional): Number of occurrences. Defaults to 1.
+        """
+        self.total += count
+
+        if item in self.counts:
+            self.counts[item] += count
+
+        elif len(self.counts) < self.capacity:
+            self.counts[item] = count
+            self.errors[item] = 0
+
+        else:
+            min_count, min_item = self.pop_min()
+            del self.counts[min_item]
+            del self.errors[min_item]
+            self.counts[item] = min_count + count
+            self.errors[item] = min_count
+
+        heapq.heappush(self.heap, (self.counts[item], item))
+
+        # Drop outdated heap entries, so that memory stays proportional to capacity
+        if len(self.heap) > 2 * self.capacity:
+            self.heap = [(count, item) for item, count in self.counts.items()]
+            heapq.heapify(self.heap)
+
+    def pop_min(self) -> tuple[int, str]:
+        """Remove least counted item from the heap.
+
+        Returns:
+            tuple[int, str]: Count and item.
+        """
+        while True:
+            count, item = heapq.heappop(self.heap)
+            if self.counts.get(item) == count:
+                return count, item
+
+    def top(
+        self, k: int = None, guaranteed: bool = False  # type: ignore
+    ) -> list[tuple[int, str]]:
+        """Most counted items, in order of first occurrence when tied.
+
+        Args:
+            k (int, optional): Number of items. Defaults to all monitored items.
+            guaranteed (bool, optional): Rank by count minus error, a lower bound of the true count. Defaults to False.
+
+        Returns:
+            list[tuple[int, str]]: Pairs of (count, item).
+        """
+        items = (
+            (count - self.errors[item] if guaranteed else count, item)
+            for item, count in self.counts.items()
+        )
+
+        if k is None:
+            return sorted(items, key=lambda x: x[0], reverse=True)
+
+        return heapq.nlargest(k, items, key=lambda x: x[0])
+
+    def is_certain(self, items: Iterable[str]) -> bool:
+        """Whether items are surely more frequent than every other item.
+
+        Args:
+            items (Iterable[str]): Monitored items.
+
+        Returns:
+            bool: True if the lowest guaranteed count of items is at least the
+                highest possible count of any other item.
+        """
+        items = set(items)
+        if not items:
+            return True
+
+        lowest = min(self.counts[item] - self.errors[item] for item in items)
+        others = [count for item, count in self.counts.items() if item not in items]
+
+        # Unmonitored items were counted at most the smallest monitored count
+        if len(self.counts) == self.capacity:
+            others.append(min(self.counts.values()))
+
+        return lowest >= max(others, default=0)
+
+
+def cut_proportion(grams: list[tuple[int, str]], total: int, proportion: float) -> int:
+    """Number of n-grams whose cumulative proportion is closest to proportion.
+
+    Args:
+        grams (list[tuple[int, str]]): Pairs of (count, n-gram), most frequent first.
+        total (int): Sum of counts of all n-grams.
+        proportion (float): Target cumulative proportion.
+
+    Returns:
+        int: Number of n-grams to keep, at least one if there are any.
+
+    Example:
+        >>> cut_proportion([(5, 'lorem'), (3, 'ipsum'), (1, 'dolor'), (1, 'sit')], 10, 0.7)
+        2
+    """
+    cum_proportion = 0.0
+    min_distance = float("inf")
+    n_grams = min(len(grams), 1)
+    for i, (count, _) in enumerate(grams, start=1):
+        cum_proportion += count / total
+        distance = abs(cum_proportion - proportion)
+        if distance < min_distance:
+            min_distance = distance
+            n_grams = i
+
+        if cum_proportion >= proportion:
+            break
+
+    return n_grams
+
 
 class Tags(Meta):
     """Create post tags.
 
+    A list of (count, n-gram) pairs, one per n-gram as returned by
+    CountVectorizer, holds exact counts already in memory, so tags are taken
+    from it directly. Any other input is streamed into a SpaceSaving counter,
+    so memory is bounded by capacity: single n-grams count once each, and
+    pairs, e.g. partial counts of chunks, add their count. Streamed tags are
+    ranked by guaranteed counts, and a warning is raised when the counter
+    cannot tell them apart from the other n-grams.
+
     Example:
         >>> text = "Lorem ipsum dolor sit. Lorem ipsum, dolor sit."
         >>> grams = [('Lorem', 'ipsum'), ('ipsum', 'dolor'), ('dolor', 'sit')]
@@ -294,15 +709,36 @@ class Tags(Meta):
         >>> _ = tags.make(grams)
         >>> tags.get()
         ['word_1', 'word_2']
+        >>> grams = [(5, 'lorem'), (3, 'ipsum'), (1, 'dolor'), (1, 'sit')]
+        >>> tags = Tags(0.7)
+        >>> _ = tags.make(grams)
+        >>> tags.get()
+        ['lorem', 'ipsum']
+        >>> tags = Tags(2, capacity=2)
+        >>> _ = tags.make(["a", "a", "b", "c", "a"])
+        >>> with warnings.catch_warnings(record=True) as caught:
+        ...     warnings.simplefilter("always")
+        ...     tags.get(), len(caught)
+        (['a', 'c'], 1)
+        >>> tags = Tags(1)
+        >>> _ = tags.make(iter([(2, 'lorem'), (1, 'ipsum'), (2, 'lorem')]))
+        >>> tags.get()
+        ['lorem']
+        >>> Tags(0.7).make([]).get()
+        []
     """
 
-    def __init__(self, top_frequent: Union[int, float] = 5) -> None:
+    def __init__(
+        self, top_frequent: Union[int, float] = 5, capacity: int = 1000
+    ) -> None:
         """_summary_
 
         Args:
             top_frequent (int, optional): Select top n_grams. Defaults to 5.
+            capacity (int, optional): Maximum number of single n-grams kept in memory. Defaults to 1000.
         """
         self.top_frequent = top_frequent
+        self.capacity = capacity
 
     def make(
         self,
@@ -316,14 +752,24 @@ class Tags(Meta):
         Returns:
             Tags:
         """
-        self.grams_df = pd.DataFrame.from_records(
-            data=n_grams, columns=["Count", "NGram"]
-        )
+        self.grams = None
+        self.counter = SpaceSaving(self.capacity)
+        self.total = 0
 
-        self.grams_df["Proportion"] = (
-            self.grams_df["Count"] / self.grams_df["Count"].sum()
-        )
-        self.grams_df["CumProportion"] = self.grams_df["Proportion"].cumsum()
+        if isinstance(n_grams, list) and n_grams and is_count_pair(n_grams[0]):
+            self.grams = n_grams
+            self.total = sum(count for count, _ in n_grams)
+
+            return self
+
+        for gram in n_grams:
+            if is_count_pair(gram):
+                self.counter.update(gram[1], int(gram[0]))
+
+            else:
+                self.counter.update(gram if isinstance(gram, str) else " ".join(gram))
+
+        self.total = self.counter.total
 
         return self
 
@@ -333,14 +779,312 @@ class Tags(Meta):
         Returns:
             Iterable[str]: n tags.
         """
-        if isinstance(self.top_frequent, int):
-            output = self.grams_df.loc[: self.top_frequent, "NGram"]
+        k = self.top_frequent if isinstance(self.top_frequent, int) else None
+
+        if self.grams is not None:
+            if k is None:
+                grams = sorted(self.grams, key=lambda x: x[0], reverse=True)
+
+            else:
+                grams = heapq.nlargest(k, self.grams, key=lambda x: x[0])
+
+        else:
+            grams = self.counter.top(k, guaranteed=True)
+
+        if k is None:
+            grams = grams[: cut_proportion(grams, self.total, self.top_frequent)]
+
+        output = [gram for _, gram in grams]
+
+        if self.grams is None and not self.counter.is_certain(output):
+            warnings.warn(
+                f"Tags may be wrong: counts of {len(output)} tags are not certain with capacity {self.capacity}"
+            )
+
+        return output
+
+
+def is_count_pair(gram) -> bool:
+    """Whether gram is a (count, n-gram) pair.
+
+    Example:
+        >>> is_count_pair((2, 'lorem ipsum')), is_count_pair(('lorem', 'ipsum'))
+        (True, False)
+    """
+    return (
+        isinstance(gram, tuple)
+        and len(gram) == 2
+        and isinstance(gram[0], (int, np.integer))
+    )
+
+
+def levenshtein(a: str, b: str) -> int:
+    """Edit distance between two strings.
+
+    Args:
+        a (str): First string.
+        b (str): Second string.
+
+    Returns:
+        int: Minimum number of insertions, deletions and substitutions.
+
+    Example:
+        >>> levenshtein("timeseries", "time_series")
+        1
+        >>> levenshtein("bayes", "bayes")
+        0
+    """
+    if len(a) < len(b):
+        a, b = b, a
+
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i]
+        for j, char_b in enumerate(b, start=1):
+            current.append(
+                min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (char_a != char_b),
+                )
+            )
+        previous = current
+
+    return previous[-1]
+
+
+class BKTree:
+    """Burkhard-Keller tree for fuzzy lookup of strings by edit distance.
+
+    Example:
+        >>> tree = BKTree()
+        >>> for word in ["pandas", "python", "git", "gpg"]:
+        ...     tree.add(word)
+        >>> sorted(tree.search("pyton", 1))
+        [(1, 'python')]
+        >>> sorted(tree.search("gig", 1))
+        [(1, 'git'), (1, 'gpg')]
+
+    References:
+        [1] https://en.wikipedia.org/wiki/BK-tree
+    """
 
-        elif isinstance(self.top_frequent, float):
-            idx = self.grams_df["CumProportion"].sub(self.top_frequent).abs().idxmin()
-            output = self.grams_df.loc[:idx, "NGram"]
+    def __init__(self, distance: Callable[[str, str], int] = levenshtein) -> None:
+        """
+        Args:
+            distance (Callable[[str, str], int], optional): Metric between strings. Defaults to levenshtein.
+        """
+        self.distance = distance
+        self.root = None
+
+    def add(self, word: str) -> None:
+        """Add word to the tree. Words already in the tree are ignored.
+
+        Args:
+            word (str): Word to be added.
+        """
+        if self.root is None:
+            self.root = (word, {})
+            return
+
+        node_word, children = self.root
+        while True:
+            d = self.distance(word, node_word)
+            if d == 0:
+                return
+
+            if d not in children:
+                children[d] = (word, {})
+                return
+
+            node_word, children = children[d]
+
+    def search(self, word: str, max_distance: int) -> list[tuple[int, str]]:
+        """Find words within max_distance of word.
+
+        Args:
+            word (str): Query word.
+            max_distance (int): Maximum edit distance.
+
+        Returns:
+            list[tuple[int, str]]: Pairs of (distance, word).
+        """
+        if self.root is None:
+            return []
+
+        output = []
+        candidates = [self.root]
+        while candidates:
+            node_word, children = candidates.pop()
+            d = self.distance(word, node_word)
+            if d <= max_distance:
+                output.append((d, node_word))
+
+            candidates.extend(
+                child
+                for child_d, child in children.items()
+                if d - max_distance <= child_d <= d + max_distance
+            )
+
+        return output
+
+
+class CanonicalTags(Meta):
+    """Map proposed tags onto an existing tag vocabulary.
+
+    Tags are compared through a normalised key (lower case, lemmatised words
+    with separators removed), so that 'time series', 'Time_Series' and
+    'timeseries' share the same key. Only tags with the same key are merged.
+    Keys that do not match exactly are looked up in a BK-tree, allowing one
+    edit per fuzzy_length characters of the key up to max_distance, and the
+    closest tag is only suggested, as a near key may well be another concept.
+    Proposals without an exact match are added to the vocabulary after each
+    call to get, so the index grows incrementally.
+
+    Example:
+        >>> vocabulary = ["time series", "Bayes", "hypothesis_tests", "python"]
+        >>> canonical = CanonicalTags(vocabulary)
+        >>> _ = canonical.make(["gpg"])
+        >>> canonical.get(["timeseries", "hypothesis test", "Bayes", "pythn", "gpu", "pandas"])
+        ['time series', 'hypothesis_tests', 'Bayes', 'pythn', 'gpu', 'pandas']
+        >>> canonical.suggestions
+        {'pythn': 'python'}
+        >>> canonical.get(["data", "date", "text", "test", "Pandas"])
+        ['data', 'date', 'text', 'test', 'pandas']
+        >>> canonical = CanonicalTags(["regression", "classification", "python"])
+        >>> canonical.get(["progression", "clarification", "cython"])
+        ['progression', 'clarification', 'cython']
+        >>> canonical.suggestions
+        {'progression': 'regression', 'clarification': 'classification', 'cython': 'python'}
+    """
+
+    def __init__(
+        self,
+        vocabulary: Iterable[str] = [],
+        max_distance: int = 2,
+        fuzzy_length: int = 5,
+        lem: WordNetLemmatizer = WordNetLemmatizer(),
+    ):
+        """
+        Args:
+            vocabulary (Iterable[str], optional): Existing tags. Defaults to [].
+            max_distance (int, optional): Maximum edit distance between normalised tags. Defaults to 2.
+            fuzzy_length (int, optional): Number of key characters per allowed edit. Defaults to 5.
+            lem (WordNetLemmatizer, optional): Word lemmatizer. Defaults to WordNetLemmatizer().
+        """
+        self.max_distance = max_distance
+        self.fuzzy_length = fuzzy_length
+        self.lem = lem
+        self.index = BKTree()
+        self.canonical = {}
+        self.suggestions = {}
 
-        return output.tolist()
+        for tag in vocabulary:
+            self.add(tag)
+
+    def normalize(self, tag: str) -> str:
+        """Normalised key of a tag.
+
+        Args:
+            tag (str): Tag.
+
+        Returns:
+            str: Lower case lemmatised words joined without separators.
+        """
+        words = re.split(r"[\s_\-]+", tag.lower().strip())
+
+        return "".join(self.lem.lemmatize(word) for word in words if word)
+
+    def add(self, tag: str) -> None:
+        """Add tag to the vocabulary, unless its key is already known.
+
+        Args:
+            tag (str): Tag.
+        """
+        key = self.normalize(tag)
+        if key and key not in self.canonical:
+            self.canonical[key] = tag
+            self.index.add(key)
+
+    def lookup(self, tag: str) -> Union[str, None]:
+        """Canonical form of tag, if any.
+
+        Args:
+            tag (str): Proposed tag.
+
+        Returns:
+            Union[str, None]: Existing tag with the same key or None if there is none.
+        """
+        return self.canonical.get(self.normalize(tag))
+
+    def suggest(self, tag: str) -> Union[str, None]:
+        """Closest existing tag with a different key, if any is close enough.
+
+        Args:
+            tag (str): Proposed tag.
+
+        Returns:
+            Union[str, None]: Closest existing tag or None if there is none close enough.
+        """
+        key = self.normalize(tag)
+        max_distance = min(self.max_distance, len(key) // self.fuzzy_length)
+        if max_distance == 0:
+            return None
+
+        matches = [match for match in self.index.search(key, max_distance) if match[0]]
+        if not matches:
+            return None
+
+        _, closest = min(matches)
+
+        return self.canonical[closest]
+
+    def make(self, tags: Iterable[str] = []) -> CanonicalTags:
+        """Add tags to the vocabulary.
+
+        Args:
+            tags (Iterable[str], optional): Tags. Defaults to [].
+
+        Returns:
+            CanonicalTags:
+        """
+        for tag in tags:
+            self.add(tag)
+
+        return self
+
+    def get(self, tags: Iterable[str]) -> list[str]:
+        """Returns canonical tags, dropping duplicates.
+
+        Proposals are only matched against the vocabulary known before the
+        call, so that they are not merged into each other. Existing tags close
+        to unmatched proposals are kept in suggestions.
+
+        Args:
+            tags (Iterable[str]): Proposed tags.
+
+        Returns:
+            list[str]: Canonical tags.
+        """
+        output = []
+        new_tags = []
+        self.suggestions = {}
+        for tag in tags:
+            canonical = self.lookup(tag)
+            if canonical is None:
+                suggestion = self.suggest(tag)
+                if suggestion is not None:
+                    self.suggestions[tag] = suggestion
+
+                new_tags.append(tag)
+                canonical = tag
+
+            if canonical not in output:
+                output.append(canonical)
+
+        self.make(new_tags)
+
+        return output
 
 
 class RegexContentFilter(Meta):
@@ -371,7 +1115,7 @@ class RegexContentFilter(Meta):
         default_list = [
             (r"http\S+", "", re.MULTILINE),  # Match website links
             (r"(`{1}(\w+|.+)\b`{1})", "", re.MULTILINE),  # Match inline code blocks
-            (r"`{3}\w+((.*|\n|\r)*)(\n|\r)`{3}", "", re.MULTILINE),  # Match code blocks
+            (r"`{3}\w+[\s\S]*?(\n|\r)`{3}", "", re.MULTILINE),  # Match code blocks
             (
                 r"-\s{1}\[{1}.+\]{1}\({1}.+\){1}",
                 "",
@@ -383,7 +1127,7 @@ class RegexContentFilter(Meta):
                 re.MULTILINE,
             ),  # Match non-word characters and digits
             (r"</?.*?>", " ", re.MULTILINE),  # Match HTML tags
-            (r"\d*", " ", re.MULTILINE),  # Remove digits
+            (r"\d+", " ", re.MULTILINE),  # Remove digits
         ]
 
         if self.regex_rules:
@@ -405,7 +1149,7 @@ class RegexContentFilter(Meta):
         """
         filtered_text = text
         for pattern, substitution, flag in self.regex_rules:
-            filtered_text = re.sub(pattern, substitution, filtered_text, flag)
+            filtered_text = re.sub(pattern, substitution, filtered_text, flags=flag)
 
         return filtered_text.strip()
 
@@ -413,50 +1157,96 @@ class RegexContentFilter(Meta):
 class LemmatizeContent(Meta):
     """Lemmatize post content
 
+    Each distinct word is lemmatized once. When vocabulary is given, get
+    returns the array of lemma ids instead of the joined text.
+
     Example:
         >>> text = "Connecting the things"
         >>> lemmatizer = LemmatizeContent()
         >>> _ = lemmatizer.make(text)
         >>> lemmatizer.get()
         'Connecting thing'
+        >>> vocabulary = Vocabulary()
+        >>> lemmatizer = LemmatizeContent(vocabulary=vocabulary)
+        >>> _ = lemmatizer.make(text)
+        >>> vocabulary.decode(lemmatizer.get("things and things"))
+        ['thing', 'thing']
     """
 
     def __init__(
         self,
         stop_words: list[str] = stopwords.words("english"),
         lem: WordNetLemmatizer = WordNetLemmatizer(),
+        vocabulary: Vocabulary = None,  # type: ignore
     ):
         """Lemmatizes post content
 
         Args:
             stop_words (list[str], optional): List of English stop words. Defaults to stopwords.words("english").
             lem (WordNetLemmatizer, optional): Word lemmatizer. Defaults to WordNetLemmatizer().
+            vocabulary (Vocabulary, optional): Vocabulary to encode lemmas with. Defaults to None.
         """
         self.stop_words = set(stop_words)
         self.lem = lem
+        self.vocabulary = vocabulary
+        self.lemmas = {}
+
+    def lemmatize(self, text: str) -> Union[list[str], np.ndarray]:
+        """Lemmatizes words in text, dropping stop words.
+
+        Args:
+            text (str): Text.
+
+        Returns:
+            Union[list[str], np.ndarray]: Lemmas, or lemma ids if vocabulary is given.
+        """
+        lemmas = []
+        for word in text.split():
+            if word in self.stop_words:
+                continue
+
+            try:
+                lemmas.append(self.lemmas[word])
+
+            except KeyError:
+                lemma = self.lem.lemmatize(word)
+                if self.vocabulary is not None:
+                    lemma = self.vocabulary.add(lemma)
+
+                self.lemmas[word] = lemma
+                lemmas.append(lemma)
+
+        if self.vocabulary is not None:
+            return np.array(lemmas, dtype=np.int32)
+
+        return lemmas
 
     def make(
         self,
         text: str,
     ) -> LemmatizeContent:
-        """Lemmatizes words in post content.
+        """Sets post content to be lemmatized by get.
 
         Args:
             content (str): Post content.
         """
-        content = text.split()
-
-        # 3.7 Lemmatisation
-        self.text = [
-            self.lem.lemmatize(word) for word in content if not word in self.stop_words
-        ]
+        self.text = text
 
         return self
 
-    def get(self, text="") -> str:
+    def get(self, text: str = None) -> Union[str, np.ndarray]:  # type: ignore
         """Get post text with lemmatized words
 
+        Args:
+            text (str, optional): Text to lemmatize. Defaults to the text given to make.
+
         Returns:
-            str: Post text with lemmatized words
+            Union[str, np.ndarray]: Post text with lemmatized words, or lemma ids if vocabulary is given.
         """
-        return " ".join(self.text)
+        # 3.7 Lemmatisation
+        lemmas = self.lemmatize(self.text if text is None else text)
+
+        if self.vocabulary is not None:
+            return lemmas
+
+        return " ".join(lemmas)